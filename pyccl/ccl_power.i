@@ -7,6 +7,7 @@
 // Enable vectorised arguments for arrays
 %apply (double* IN_ARRAY1, int DIM1) {(double* k, int nk)};
 %apply (double* IN_ARRAY1, int DIM1) {(double* R, int nR)};
+%apply (double* IN_ARRAY1, int DIM1) {(double* a_arr, int na)};
 %apply (int DIM1, double* ARGOUT_ARRAY1) {(int nout, double* output)};
 
 %include "../include/ccl_power.h"
@@ -60,5 +61,39 @@ void sigmaV_vec(ccl_cosmology * cosmo, double a, double* R, int nR,
 
 %}
 
+/* The python code here will be executed before all of the functions that
+   follow this directive. */
+%feature("pythonprepend") %{
+    if numpy.size(k) * numpy.size(a_arr) != nout:
+        raise CCLError("Input shape for `k` and `a_arr` must match "
+                       "`(nout,)`!")
+%}
+
+%inline %{
+
+void linear_matter_power_2d_vec(ccl_cosmology * cosmo,
+                                double* a_arr, int na,
+                                double* k, int nk,
+                                int nout, double* output, int* status) {
+    for(int j=0; j < na; j++){
+      for(int i=0; i < nk; i++){
+        output[j*nk + i] = ccl_linear_matter_power(cosmo, k[i], a_arr[j], status);
+      }
+    }
+}
+
+void nonlin_matter_power_2d_vec(ccl_cosmology * cosmo,
+                                double* a_arr, int na,
+                                double* k, int nk,
+                                int nout, double* output, int* status) {
+    for(int j=0; j < na; j++){
+      for(int i=0; i < nk; i++){
+        output[j*nk + i] = ccl_nonlin_matter_power(cosmo, k[i], a_arr[j], status);
+      }
+    }
+}
+
+%}
+
 /* The directive gets carried between files, so we reset it at the end. */
 %feature("pythonprepend") %{ %}
@@ -1,8 +1,9 @@
+import weakref
 import numpy as np
 from .. import ccllib as lib
 from ..core import check
 from ..pk2d import Pk2D
-from ..power import linear_matter_power, nonlin_matter_power
+from ..power import linear_matter_power
 from ..background import growth_factor
 from .tracers import PTTracer
 
@@ -13,9 +14,29 @@ except ImportError:
     HAVE_FASTPT = False
 
 
+def _stack_kernels(kernels):
+    # Stacks a list of k-dependent kernels into a C-contiguous
+    # float64 array of shape `(N_kernels, N_k)`.
+    return np.ascontiguousarray(kernels, dtype=np.float64)
+
+
+# Default wavenumber sampling used for PT calculations
+_LOG10K_MIN = -4
+_LOG10K_MAX = 2
+_NK_PER_DECADE = 20
+
+
+def _get_ks(log10k_min=_LOG10K_MIN, log10k_max=_LOG10K_MAX,
+            nk_per_decade=_NK_PER_DECADE):
+    # Wavenumbers at which PT quantities are sampled.
+    nk_total = int((log10k_max - log10k_min) * nk_per_decade)
+    return np.logspace(log10k_min, log10k_max, nk_total)
+
+
 class PTCalculator(object):
     def __init__(self, with_NC=False, with_IA=False, with_dd=True,
-                 log10k_min=-4, log10k_max=2, nk_per_decade=20,
+                 log10k_min=_LOG10K_MIN, log10k_max=_LOG10K_MAX,
+                 nk_per_decade=_NK_PER_DECADE,
                  pad_factor=1, low_extrap=-5, high_extrap=3,
                  P_window=None, C_window=.75):
         """ This class implements a set of methods that can be
@@ -61,47 +82,123 @@ class PTCalculator(object):
                 "installed to use CCL to get PT observables! "
                 "You can install it with pip install fast-pt.")
 
-        self.with_dd = with_dd
+        # The one-loop matter power spectrum is a by-product of
+        # the number counts terms, so it is always available then.
+        self.with_dd = with_dd or with_NC
         self.with_NC = with_NC
         self.with_IA = with_IA
         self.P_window = P_window
         self.C_window = C_window
 
+        # FAST-PT builds all the k-dependent (but P(k)-independent)
+        # FFTLog matrices needed by the terms listed in `to_do` at
+        # initialization, so `update_pk` only has to pay for the FFTs
+        # of the input power spectrum. Make sure every term used in
+        # `update_pk` is requested here.
         to_do = ['one_loop_dd']
         if self.with_NC:
             to_do.append('dd_bias')
         if self.with_IA:
             to_do.append('IA')
 
-        nk_total = int((log10k_max - log10k_min) * nk_per_decade)
-        self.ks = np.logspace(log10k_min, log10k_max, nk_total)
+        self.ks = _get_ks(log10k_min, log10k_max, nk_per_decade)
+        # Natural log of `ks`, as needed by Pk2D
+        self._lk_arr = np.log(self.ks)
         n_pad = int(pad_factor * len(self.ks))
 
         self.pt = fpt.FASTPT(self.ks, to_do=to_do,
                              low_extrap=low_extrap,
                              high_extrap=high_extrap,
                              n_pad=n_pad)
+        self._reset_kernels()
+        # Fingerprint of the last input power spectrum
+        self._pk_sig = None
+        # Output work array reused by `get_pt_pk2d`
+        self._p_out_buf = None
+
+    def _reset_kernels(self):
+        # Clears all the P(k)-dependent PT arrays, so that kernels
+        # computed for a previous power spectrum can't be used.
         self.one_loop_dd = None
         self.dd_bias = None
         self.ia_ta = None
         self.ia_tt = None
         self.ia_mix = None
-
-    def update_pk(self, pk):
+        # Kernel combinations shared by several IA spectra
+        self._ia_ta_sum = None
+        self._ia_mix_sum = None
+        # k-dependent kernels entering each spectrum, stacked
+        # as `(N_kernels, N_k)` arrays
+        self._dd_kernels_gg = None
+        self._dd_kernels_gm = None
+        self._dd_kernels_gg_lowk = None
+        self._ia_kernels_gi = None
+        self._ia_kernels_ee = None
+        self._ia_kernels_bb = None
+        # Kernel groups computed for the current power spectrum
+        self._kernels_done = set()
+
+    def update_pk(self, pk, need_nc=True, need_ia=True, need_dd=True):
         """ Update the internal PT arrays.
+
+        The FAST-PT calculations are skipped if `pk` is identical to
+        the power spectrum passed in the previous call, so the same
+        calculator can be reused across many calls to
+        :func:`get_pt_pk2d` (e.g. in an MCMC where only the biases
+        change) without recomputing the PT kernels. Kernels that are
+        not needed are not computed until a later call requests them.
+
         Args:
             pk (array_like): linear power spectrum sampled at the
                 internal `k` values used by this calculator.
+            need_nc (bool): compute the number counts kernels (only
+                if this calculator was initialized with `with_NC`).
+            need_ia (bool): compute the intrinsic alignment kernels
+                (only if this calculator was initialized with
+                `with_IA`).
+            need_dd (bool): compute the one-loop matter power
+                spectrum (only if this calculator was initialized
+                with `with_dd`).
         """
         if pk.shape != self.ks.shape:
             raise ValueError("Input spectrum has wrong shape")
-        if self.with_NC:
+        pk_sig = pk.tobytes()
+        if pk_sig != self._pk_sig:
+            # New power spectrum: all kernels must be recomputed
+            self._reset_kernels()
+            self._pk_sig = pk_sig
+        done = self._kernels_done
+
+        need_nc = need_nc and self.with_NC and ('nc' not in done)
+        need_ia = need_ia and self.with_IA and ('ia' not in done)
+        need_dd = need_dd and self.with_dd and ('dd' not in done)
+
+        if need_nc:
             self._get_dd_bias(pk)
-            self.with_dd = True
-        elif self.with_dd:
+            done.update(['nc', 'dd'])
+        elif need_dd:
+            # One-loop dd power spectrum only needed
+            # if dd_bias is not computed.
             self._get_one_loop_dd(pk)
-        if self.with_IA:
+            done.add('dd')
+        if need_ia:
             self._get_ia_bias(pk)
+            done.add('ia')
+
+    def _get_out_buf(self, na, n_out=1):
+        # Returns `n_out` arrays of shape `(na, N_k)`, stored in a
+        # persistent buffer that is only reallocated if it is too
+        # small. Pk2D copies its input, so the same memory can be
+        # safely reused across calls.
+        buf = self._p_out_buf
+        if (buf is None) or (buf.shape[0] < n_out) or (buf.shape[1] < na):
+            shape = [n_out, na, len(self.ks)]
+            if buf is not None:
+                shape[0] = max(n_out, buf.shape[0])
+                shape[1] = max(na, buf.shape[1])
+            buf = np.empty(shape)
+            self._p_out_buf = buf
+        return buf[:n_out, :na]
 
     def _get_one_loop_dd(self, pk):
         # Precompute quantities needed for one-loop dd
@@ -117,6 +214,19 @@ class PTCalculator(object):
                                                 P_window=self.P_window,
                                                 C_window=self.C_window)
         self.one_loop_dd = self.dd_bias[0:1]
+        # Pd1d2, Pd2d2, Pd1s2, Pd2s2 and Ps2s2 kernels, including
+        # their numerical prefactors
+        self._dd_kernels_gg = _stack_kernels([0.5*self.dd_bias[2],
+                                              0.25*self.dd_bias[3],
+                                              0.5*self.dd_bias[4],
+                                              0.25*self.dd_bias[5],
+                                              0.25*self.dd_bias[6]])
+        # Pd1d2 and Pd1s2 kernels
+        self._dd_kernels_gm = _stack_kernels(self._dd_kernels_gg[[0, 2]])
+        # Same as `_dd_kernels_gg`, plus a constant kernel used to
+        # subtract the low-k white noise contribution
+        self._dd_kernels_gg_lowk = _stack_kernels(
+            list(self._dd_kernels_gg) + [np.ones_like(self.ks)])
 
     def _get_ia_bias(self, pk):
         # Precompute quantities needed for intrinsic alignment
@@ -130,10 +240,24 @@ class PTCalculator(object):
         self.ia_mix = self.pt.IA_mix(pk,
                                      P_window=self.P_window,
                                      C_window=self.C_window)
+        # a00e + c00e and a0e2 + b0e2 always appear together
+        self._ia_ta_sum = self.ia_ta[0] + self.ia_ta[1]
+        self._ia_mix_sum = self.ia_mix[0] + self.ia_mix[1]
+        a00e, c00e, a0e0e, a0b0b = self.ia_ta
+        ae2e2, ab2b2 = self.ia_tt
+        a0e2, b0e2, d0ee2, d0bb2 = self.ia_mix
+        self._ia_kernels_gi = _stack_kernels([self._ia_ta_sum,
+                                              self._ia_mix_sum])
+        # The first three E-mode kernels pair up with the same
+        # coefficients as the B-mode ones (see `get_pii`).
+        self._ia_kernels_ee = _stack_kernels([a0e0e, ae2e2, d0ee2,
+                                              self._ia_ta_sum,
+                                              self._ia_mix_sum])
+        self._ia_kernels_bb = _stack_kernels([a0b0b, ab2b2, d0bb2])
 
     def get_pgg(self, Pd1d1, g4,
                 b11, b21, bs1, b12, b22, bs2,
-                sub_lowk):
+                sub_lowk, out=None):
         """ Get the number counts auto-spectrum at the internal
         set of wavenumbers (given by this object's `ks` attribute)
         and a number of redshift values.
@@ -157,33 +281,37 @@ class PTCalculator(object):
                 being correlated at the same set of input redshifts.
             sub_lowk (bool): if True, the small-scale white noise
                 contribution will be subtracted.
+            out (array_like): optional output array of shape
+                `(N_z, N_k)` in which to store the result.
 
         Returns:
-            array_like: 2D array of shape `(N_k, N_z)`, where `N_k` \
+            array_like: 2D array of shape `(N_z, N_k)`, where `N_k` \
                 is the size of this object's `ks` attribute, and \
                 `N_z` is the size of the input redshift-dependent \
                 biases and growth factor.
         """
-        Pd1d2 = g4[None, :] * self.dd_bias[2][:, None]
-        Pd2d2 = g4[None, :] * self.dd_bias[3][:, None]
-        Pd1s2 = g4[None, :] * self.dd_bias[4][:, None]
-        Pd2s2 = g4[None, :] * self.dd_bias[5][:, None]
-        Ps2s2 = g4[None, :] * self.dd_bias[6][:, None]
-
-        s4 = 0.
         if sub_lowk:
-            s4 = g4 * self.dd_bias[7]
-            s4 = s4[None, :]
-
-        pgg = ((b11*b12)[None, :] * Pd1d1 +
-               0.5*(b11*b22 + b12*b21)[None, :] * Pd1d2 +
-               0.25*(b21*b22)[None, :] * (Pd2d2 - 2.*s4) +
-               0.5*(b11*bs2 + b12*bs1)[None, :] * Pd1s2 +
-               0.25*(b21*bs2 + b22*bs1)[None, :] * (Pd2s2 - (4./3.)*s4) +
-               0.25*(bs1*bs2)[None, :] * (Ps2s2 - (8./9.)*s4))
+            kernels = self._dd_kernels_gg_lowk
+        else:
+            kernels = self._dd_kernels_gg
+        coeffs = np.empty([len(kernels), len(g4)])
+        np.add(b11*b22, b12*b21, out=coeffs[0])
+        np.multiply(b21, b22, out=coeffs[1])
+        np.add(b11*bs2, b12*bs1, out=coeffs[2])
+        np.add(b21*bs2, b22*bs1, out=coeffs[3])
+        np.multiply(bs1, bs2, out=coeffs[4])
+        if sub_lowk:
+            # Coefficient of the constant low-k kernel
+            np.multiply(-self.dd_bias[7],
+                        0.5*coeffs[1] + (1./3.)*coeffs[3] +
+                        (2./9.)*coeffs[4], out=coeffs[5])
+        coeffs *= g4
+
+        pgg = np.matmul(coeffs.T, kernels, out=out)
+        pgg += (b11*b12)[:, None] * Pd1d1
         return pgg
 
-    def get_pgi(self, Pd1d1, g4, b1, b2, bs, c1, c2, cd):
+    def get_pgi(self, Pd1d1, g4, b1, b2, bs, c1, c2, cd, out=None):
         """ Get the number counts - IA cross-spectrum at the
         internal set of wavenumbers (given by this object's
         `ks` attribute) and a number of redshift values.
@@ -211,22 +339,25 @@ class PTCalculator(object):
                 being correlated at the same set of input redshifts.
             cd (array_like): overdensity bias for the IA tracer
                 being correlated at the same set of input redshifts.
+            out (array_like): optional output array of shape
+                `(N_z, N_k)` in which to store the result.
 
         Returns:
-            array_like: 2D array of shape `(N_k, N_z)`, where `N_k` \
+            array_like: 2D array of shape `(N_z, N_k)`, where `N_k` \
                 is the size of this object's `ks` attribute, and \
                 `N_z` is the size of the input redshift-dependent \
                 biases and growth factor.
         """
-        a00e, c00e, a0e0e, a0b0b = self.ia_ta
-        a0e2, b0e2, d0ee2, d0bb2 = self.ia_mix
+        b1g4 = b1 * g4
+        coeffs = np.empty([2, len(g4)])
+        np.multiply(cd, b1g4, out=coeffs[0])
+        np.multiply(c2, b1g4, out=coeffs[1])
 
-        pgi = b1[None, :] * (c1[None, :] * Pd1d1 +
-                             (g4*cd)[None, :] * (a00e + c00e)[:, None] +
-                             (g4*c2)[None, :] * (a0e2 + b0e2)[:, None])
+        pgi = np.matmul(coeffs.T, self._ia_kernels_gi, out=out)
+        pgi += (b1*c1)[:, None] * Pd1d1
         return pgi
 
-    def get_pgm(self, Pd1d1, g4, b1, b2, bs):
+    def get_pgm(self, Pd1d1, g4, b1, b2, bs, out=None):
         """ Get the number counts - matter cross-spectrum at the
         internal set of wavenumbers (given by this object's `ks`
         attribute) and a number of redshift values.
@@ -245,24 +376,26 @@ class PTCalculator(object):
             bs (array_like): tidal bias for the number counts
                 tracer being correlated at the same set of input
                 redshifts.
+            out (array_like): optional output array of shape
+                `(N_z, N_k)` in which to store the result.
 
         Returns:
-            array_like: 2D array of shape `(N_k, N_z)`, where `N_k` \
+            array_like: 2D array of shape `(N_z, N_k)`, where `N_k` \
                 is the size of this object's `ks` attribute, and \
                 `N_z` is the size of the input redshift-dependent \
                 biases and growth factor.
         """
-        Pd1d2 = g4[None, :] * self.dd_bias[2][:, None]
-        Pd1s2 = g4[None, :] * self.dd_bias[4][:, None]
+        coeffs = np.empty([2, len(g4)])
+        np.multiply(b2, g4, out=coeffs[0])
+        np.multiply(bs, g4, out=coeffs[1])
 
-        pgm = (b1[None, :] * Pd1d1 +
-               0.5 * b2[None, :] * Pd1d2 +
-               0.5 * bs[None, :] * Pd1s2)
+        pgm = np.matmul(coeffs.T, self._dd_kernels_gm, out=out)
+        pgm += b1[:, None] * Pd1d1
         return pgm
 
     def get_pii(self, Pd1d1, g4, c11, c21, cd1,
                 c12, c22, cd2, return_bb=False,
-                return_both=False):
+                return_both=False, out=None):
         """ Get the intrinsic alignment auto-spectrum at the internal
         set of wavenumbers (given by this object's `ks` attribute)
         and a number of redshift values.
@@ -288,41 +421,51 @@ class PTCalculator(object):
                 will be returned.
             return_both (bool): if `True`, both the E- and B-mode
                 power spectra will be returned. Supersedes `return_bb`.
+            out (array_like): optional output array of shape
+                `(N_z, N_k)` in which to store the result. If
+                `return_both` is `True`, this should be a tuple
+                containing two such arrays (E- and B-modes).
 
         Returns:
-            array_like: 2D array of shape `(N_k, N_z)`, where `N_k` \
+            array_like: 2D array of shape `(N_z, N_k)`, where `N_k` \
                 is the size of this object's `ks` attribute, and \
                 `N_z` is the size of the input redshift-dependent \
                 biases and growth factor.
         """
-        a00e, c00e, a0e0e, a0b0b = self.ia_ta
-        ae2e2, ab2b2 = self.ia_tt
-        a0e2, b0e2, d0ee2, d0bb2 = self.ia_mix
-
         if return_both:
             return_bb = True
+            if out is None:
+                out = (None, None)
+            out_ee, out_bb = out
+        else:
+            out_ee = out_bb = out
+
+        # Redshift-dependent coefficients of the E-mode kernels.
+        # The first three also multiply the B-mode kernels.
+        coeffs = np.empty([5, len(g4)])
+        np.multiply(cd1, cd2, out=coeffs[0])
+        np.multiply(c21, c22, out=coeffs[1])
+        np.add(cd1*c22, cd2*c21, out=coeffs[2])
+        np.add(c11*cd2, c12*cd1, out=coeffs[3])
+        np.add(c11*c22, c21*c12, out=coeffs[4])
+        coeffs *= g4
 
         if return_bb:
-            pii_bb = ((cd1*cd2*g4)[None, :] * a0b0b[:, None] +
-                      (c21*c22*g4)[None, :] * ab2b2[:, None] +
-                      ((cd1*c22 + c21*cd2)*g4)[None, :] * d0bb2[:, None])
+            pii_bb = np.matmul(coeffs[:3].T, self._ia_kernels_bb,
+                               out=out_bb)
             if not return_both:
                 pii = pii_bb
 
         if (not return_bb) or return_both:
-            pii = ((c11*c12)[None, :] * Pd1d1 +
-                   ((c11*cd2 + c12*cd1)*g4)[None, :] * (a00e + c00e)[:, None] +
-                   (cd1*cd2*g4)[None, :] * a0e0e[:, None] +
-                   (c21*c22*g4)[None, :] * ae2e2[:, None] +
-                   ((c11*c22 + c21*c12)*g4)[None, :] * (a0e2 + b0e2)[:, None] +
-                   ((cd1*c22 + cd2*c21)*g4)[None, :] * d0ee2[:, None])
+            pii = np.matmul(coeffs.T, self._ia_kernels_ee, out=out_ee)
+            pii += (c11*c12)[:, None] * Pd1d1
 
         if return_both:
             return pii, pii_bb
         else:
             return pii
 
-    def get_pim(self, Pd1d1, g4, c1, c2, cd):
+    def get_pim(self, Pd1d1, g4, c1, c2, cd, out=None):
         """ Get the intrinsic alignment - matter cross-spectrum at
         the internal set of wavenumbers (given by this object's `ks`
         attribute) and a number of redshift values.
@@ -341,19 +484,21 @@ class PTCalculator(object):
             cd (array_like): overdensity bias for the IA
                 tracer being correlated at the same set of input
                 redshifts.
+            out (array_like): optional output array of shape
+                `(N_z, N_k)` in which to store the result.
 
         Returns:
-            array_like: 2D array of shape `(N_k, N_z)`, where `N_k` \
+            array_like: 2D array of shape `(N_z, N_k)`, where `N_k` \
                 is the size of this object's `ks` attribute, and \
                 `N_z` is the size of the input redshift-dependent \
                 biases and growth factor.
         """
-        a00e, c00e, a0e0e, a0b0b = self.ia_ta
-        a0e2, b0e2, d0ee2, d0bb2 = self.ia_mix
+        coeffs = np.empty([2, len(g4)])
+        np.multiply(cd, g4, out=coeffs[0])
+        np.multiply(c2, g4, out=coeffs[1])
 
-        pim = (c1[None, :] * Pd1d1 +
-               (g4*cd)[None, :] * (a00e + c00e)[:, None] +
-               (g4*c2)[None, :] * (a0e2 + b0e2)[:, None])
+        pim = np.matmul(coeffs.T, self._ia_kernels_gi, out=out)
+        pim += c1[:, None] * Pd1d1
         return pim
 
     def get_pmm(self, Pd1d1_lin, g4):
@@ -367,16 +512,161 @@ class PTCalculator(object):
                 a number of redshifts.
 
         Returns:
-            array_like: 2D array of shape `(N_k, N_z)`, where `N_k` \
+            array_like: 2D array of shape `(N_z, N_k)`, where `N_k` \
                 is the size of this object's `ks` attribute, and \
                 `N_z` is the size of the input redshift-dependent \
                 biases and growth factor.
         """
-        P1loop = g4[None, :] * self.one_loop_dd[0][:, None]
+        P1loop = g4[:, None] * self.one_loop_dd[0][None, :]
         pmm = (Pd1d1_lin + P1loop)
         return pmm
 
 
+# Number of scale factor values processed at a time by get_pt_pk2d
+_A_TILE = 32
+
+
+# Powers of the growth factor for each cosmology, together with
+# the scale factor values at which they were last evaluated.
+_GROWTH_CACHE = weakref.WeakKeyDictionary()
+
+
+def _get_growth_powers(cosmo, a_arr):
+    # Returns D(a), D(a)^2 and D(a)^4, caching them so that repeated
+    # calls with the same cosmology and scale factors (e.g. when
+    # only the biases change) do not call CCL again. Only the last
+    # set of scale factors is kept for each cosmology. The returned
+    # arrays are shared and must not be modified.
+    key = np.asarray(a_arr, dtype=float).tobytes()
+    cached = _GROWTH_CACHE.get(cosmo)
+    if (cached is None) or (cached[0] != key):
+        ga = growth_factor(cosmo, a_arr)
+        ga2 = ga * ga
+        ga4 = ga2 * ga2
+        cached = (key, (ga, ga2, ga4))
+        _GROWTH_CACHE[cosmo] = cached
+    return cached[1]
+
+
+def _get_pk_grid(cosmo, ks, a_arr, nonlin=True):
+    # Evaluates the linear or non-linear matter power spectrum
+    # on a (k, a) grid with a single call to the C library.
+    # Returns an array of shape `(N_a, N_k)`.
+    if nonlin:
+        cosmo.compute_nonlin_power()
+        pk_fn = lib.nonlin_matter_power_2d_vec
+    else:
+        cosmo.compute_linear_power()
+        pk_fn = lib.linear_matter_power_2d_vec
+    a_arr = np.atleast_1d(a_arr).astype(float)
+    status = 0
+    pk, status = pk_fn(cosmo.cosmo, a_arr, ks,
+                       len(a_arr) * len(ks), status)
+    check(status, cosmo)
+    return pk.reshape([len(a_arr), len(ks)])
+
+
+# Transfer functions for which the linear power spectrum is exactly
+# P_lin(k, z=0) times the (scale-independent) squared growth factor.
+_PKLIN_FACTORIZABLE = ['bbks', 'eisenstein_hu']
+
+
+def _get_pklin_grid(cosmo, ks, a_arr, pk_lin_z0, ga2):
+    # Linear matter power spectrum on a (k, a) grid, of shape
+    # `(N_a, N_k)`. Analytic spectra are rescaled from z=0 by the
+    # growth factor. Otherwise (e.g. Boltzmann codes with massive
+    # neutrinos, or an input P(k, a)) growth may depend on scale,
+    # and P_lin(k, a) is evaluated on the full grid.
+    tf = cosmo._config_init_kwargs['transfer_function']
+    if tf in _PKLIN_FACTORIZABLE:
+        return ga2[:, None] * pk_lin_z0[None, :]
+    return _get_pk_grid(cosmo, ks, a_arr, nonlin=False)
+
+
+# Biases entering the PT power spectra for each tracer type, in
+# the order expected by the `_get_pk_*` functions below.
+_BIAS_NAMES = {'NC': ['b1', 'b2', 'bs'],
+               'IA': ['c1', 'c2', 'cdelta'],
+               'M': []}
+
+
+def _get_biases(tracer, z_arr):
+    return [tracer.get_bias(b, z_arr)
+            for b in _BIAS_NAMES[tracer.type]]
+
+
+def _get_pk_gg(ptc, bias1, bias2, Pd1d1, ga4, out, sub_lowk=False):
+    b11, b21, bs1 = bias1
+    b12, b22, bs2 = bias2
+    return ptc.get_pgg(Pd1d1, ga4,
+                       b11, b21, bs1, b12, b22, bs2,
+                       sub_lowk, out=out)
+
+
+def _get_pk_gi(ptc, bias1, bias2, Pd1d1, ga4, out):
+    b1, b2, bs = bias1
+    c1, c2, cd = bias2
+    return ptc.get_pgi(Pd1d1, ga4,
+                       b1, b2, bs, c1, c2, cd,
+                       out=out)
+
+
+def _get_pk_gm(ptc, bias1, bias2, Pd1d1, ga4, out):
+    b1, b2, bs = bias1
+    return ptc.get_pgm(Pd1d1, ga4,
+                       b1, b2, bs,
+                       out=out)
+
+
+def _get_pk_ii(ptc, bias1, bias2, Pd1d1, ga4, out,
+               return_bb=False, return_both=False):
+    c11, c21, cd1 = bias1
+    c12, c22, cd2 = bias2
+    return ptc.get_pii(Pd1d1, ga4,
+                       c11, c21, cd1, c12, c22, cd2,
+                       return_bb=return_bb, return_both=return_both,
+                       out=out)
+
+
+def _get_pk_im(ptc, bias1, bias2, Pd1d1, ga4, out):
+    c1, c2, cd = bias1
+    return ptc.get_pim(Pd1d1, ga4,
+                       c1, c2, cd,
+                       out=out)
+
+
+def _get_pk_mm(ptc, bias1, bias2, Pd1d1, ga4, out):
+    out[:, :] = Pd1d1
+    return out
+
+
+# Function computing the PT power spectrum for each combination
+# of tracer types, whether the two tracers must be swapped before
+# passing them to it, and the `get_pt_pk2d` options it takes.
+_PK_FUNCS = {('NC', 'NC'): (_get_pk_gg, False, ['sub_lowk']),
+             ('NC', 'IA'): (_get_pk_gi, False, []),
+             ('NC', 'M'): (_get_pk_gm, False, []),
+             ('IA', 'NC'): (_get_pk_gi, True, []),
+             ('IA', 'IA'): (_get_pk_ii, False, ['return_bb',
+                                                'return_both']),
+             ('IA', 'M'): (_get_pk_im, False, []),
+             ('M', 'NC'): (_get_pk_gm, True, []),
+             ('M', 'IA'): (_get_pk_im, True, []),
+             ('M', 'M'): (_get_pk_mm, False, [])}
+
+
+def _get_pd1d1(cosmo, ks, a_arr, nonlin_pk_type, pk_lin_z0, ga2, ga4,
+               ptc=None):
+    # Matter power spectrum multiplying the linear bias terms, of
+    # shape `(N_a, N_k)`. `ptc` is only needed for SPT.
+    if nonlin_pk_type == 'nonlinear':
+        return _get_pk_grid(cosmo, ks, a_arr)
+    pklin = _get_pklin_grid(cosmo, ks, a_arr, pk_lin_z0, ga2)
+    if nonlin_pk_type == 'spt':
+        return ptc.get_pmm(pklin, ga4)
+    return pklin
+
+
 def get_pt_pk2d(cosmo, tracer1, tracer2=None, ptc=None,
                 sub_lowk=False, nonlin_pk_type='nonlinear',
                 a_arr=None, extrap_order_lok=1, extrap_order_hik=2,
@@ -406,7 +696,9 @@ def get_pt_pk2d(cosmo, tracer1, tracer2=None, ptc=None,
         nonlin_pk_type (str): type of 1-loop matter power spectrum
             to use. 'linear' for linear P(k), 'nonlinear' for the internal
             non-linear power spectrum, 'spt' for standard perturbation
-            theory power spectrum. Default: 'nonlinear'.
+            theory power spectrum. Default: 'nonlinear'. As for the
+            perturbation theory terms, the linear P(k) is obtained by
+            rescaling its value at z=0 with the linear growth factor.
         a_arr (array): an array holding values of the scale factor
             at which the power spectrum should be calculated for
             interpolation. If `None`, the internal values used by
@@ -445,6 +737,31 @@ def get_pt_pk2d(cosmo, tracer1, tracer2=None, ptc=None,
     if not isinstance(tracer2, PTTracer):
         raise TypeError("tracer2 must be of type `PTTracer`")
 
+    if nonlin_pk_type not in ['nonlinear', 'linear', 'spt']:
+        raise NotImplementedError("Nonlinear option %s not implemented yet" %
+                                  (nonlin_pk_type))
+
+    if (ptc is not None) and (not isinstance(ptc, PTCalculator)):
+        raise TypeError("ptc should be of type `PTCalculator`")
+
+    # The matter auto-spectrum needs no PT terms unless SPT is
+    # requested, so FAST-PT is skipped altogether (and no calculator
+    # is created if none was passed).
+    if ((tracer1.type == 'M') and (tracer2.type == 'M') and
+            (nonlin_pk_type != 'spt')):
+        if ptc is None:
+            ks = _get_ks()
+            lk_arr = np.log(ks)
+        else:
+            ks = ptc.ks
+            lk_arr = ptc._lk_arr
+        pk_lin_z0 = linear_matter_power(cosmo, ks, 1.)
+        _, ga2, ga4 = _get_growth_powers(cosmo, a_arr)
+        p_pt = _get_pd1d1(cosmo, ks, a_arr, nonlin_pk_type,
+                          pk_lin_z0, ga2, ga4)
+        return Pk2D(a_arr=a_arr, lk_arr=lk_arr, pk_arr=p_pt,
+                    is_logp=False)
+
     if ptc is None:
         with_NC = ((tracer1.type == 'NC') or
                    (tracer2.type == 'NC'))
@@ -454,8 +771,6 @@ def get_pt_pk2d(cosmo, tracer1, tracer2=None, ptc=None,
         ptc = PTCalculator(with_dd=with_dd,
                            with_NC=with_NC,
                            with_IA=with_IA)
-    if not isinstance(ptc, PTCalculator):
-        raise TypeError("ptc should be of type `PTCalculator`")
 
     if (tracer1.type == 'NC') or (tracer2.type == 'NC'):
         if not ptc.with_NC:
@@ -470,120 +785,82 @@ def get_pt_pk2d(cosmo, tracer1, tracer2=None, ptc=None,
             raise ValueError("Need 1-loop matter power spectrum, "
                              "but calculator didn't compute it")
 
+    if (tracer1.type, tracer2.type) not in _PK_FUNCS:
+        raise NotImplementedError("Combination %s-%s not implemented yet" %
+                                  (tracer1.type, tracer2.type))
+    pk_func, swap, opt_names = _PK_FUNCS[(tracer1.type, tracer2.type)]
+    if swap:
+        tracer1, tracer2 = tracer2, tracer1
+
     if return_ia_ee_and_bb:
         return_ia_bb = True
+    # E- and B-mode spectra are only returned for IA auto-correlations
+    return_ia_ee_and_bb = (return_ia_ee_and_bb and
+                           (tracer1.type == 'IA') and
+                           (tracer2.type == 'IA'))
+    opts = {'sub_lowk': sub_lowk,
+            'return_bb': return_ia_bb,
+            'return_both': return_ia_ee_and_bb}
+    opts = dict((k, opts[k]) for k in opt_names)
 
-    # z
-    z_arr = 1. / a_arr - 1
     # P_lin(k) at z=0
     pk_lin_z0 = linear_matter_power(cosmo, ptc.ks, 1.)
 
     # Linear growth factor
-    ga = growth_factor(cosmo, a_arr)
-    ga4 = ga**4
-
-    # update the PTC to have the require Pk components
-    ptc.update_pk(pk_lin_z0)
-
-    if nonlin_pk_type == 'nonlinear':
-        Pd1d1 = np.array([nonlin_matter_power(cosmo, ptc.ks, a)
-                          for a in a_arr]).T
-    elif nonlin_pk_type == 'linear':
-        Pd1d1 = np.array([linear_matter_power(cosmo, ptc.ks, a)
-                          for a in a_arr]).T
-    elif nonlin_pk_type == 'spt':
-        pklin = np.array([linear_matter_power(cosmo, ptc.ks, a)
-                          for a in a_arr]).T
-        Pd1d1 = ptc.get_pmm(pklin, ga4)
+    _, ga2, ga4 = _get_growth_powers(cosmo, a_arr)
+
+    # update the PTC to have the require Pk components,
+    # computing only the kernels needed by this tracer pair
+    types = (tracer1.type, tracer2.type)
+    ptc.update_pk(pk_lin_z0,
+                  need_nc='NC' in types,
+                  need_ia='IA' in types,
+                  need_dd=nonlin_pk_type == 'spt')
+
+    # Biases are evaluated once for all scale factors (and only
+    # once for auto-correlations), and then sliced for each tile.
+    z_arr = 1. / a_arr - 1
+    biases1 = _get_biases(tracer1, z_arr)
+    if tracer2 is tracer1:
+        biases2 = biases1
     else:
-        raise NotImplementedError("Nonlinear option %s not implemented yet" %
-                                  (nonlin_pk_type))
+        biases2 = _get_biases(tracer2, z_arr)
 
-    if (tracer1.type == 'NC'):
-        b11 = tracer1.b1(z_arr)
-        b21 = tracer1.b2(z_arr)
-        bs1 = tracer1.bs(z_arr)
-        if (tracer2.type == 'NC'):
-            b12 = tracer2.b1(z_arr)
-            b22 = tracer2.b2(z_arr)
-            bs2 = tracer2.bs(z_arr)
-
-            p_pt = ptc.get_pgg(Pd1d1, ga4,
-                               b11, b21, bs1, b12, b22, bs2,
-                               sub_lowk)
-        elif (tracer2.type == 'IA'):
-            c12 = tracer2.c1(z_arr)
-            c22 = tracer2.c2(z_arr)
-            cd2 = tracer2.cdelta(z_arr)
-            p_pt = ptc.get_pgi(Pd1d1, ga4,
-                               b11, b21, bs1, c12, c22, cd2)
-        elif (tracer2.type == 'M'):
-            p_pt = ptc.get_pgm(Pd1d1, ga4,
-                               b11, b21, bs1)
-        else:
-            raise NotImplementedError("Combination %s-%s not implemented yet" %
-                                      (tracer1.type, tracer2.type))
-    elif (tracer1.type == 'IA'):
-        c11 = tracer1.c1(z_arr)
-        c21 = tracer1.c2(z_arr)
-        cd1 = tracer1.cdelta(z_arr)
-        if (tracer2.type == 'IA'):
-            c12 = tracer2.c1(z_arr)
-            c22 = tracer2.c2(z_arr)
-            cd2 = tracer2.cdelta(z_arr)
-            p_pt = ptc.get_pii(Pd1d1, ga4,
-                               c11, c21, cd1, c12, c22, cd2,
-                               return_bb=return_ia_bb,
-                               return_both=return_ia_ee_and_bb)
-        elif (tracer2.type == 'NC'):
-            b12 = tracer2.b1(z_arr)
-            b22 = tracer2.b2(z_arr)
-            bs2 = tracer2.bs(z_arr)
-            p_pt = ptc.get_pgi(Pd1d1, ga4,
-                               b12, b22, bs2, c11, c21, cd1)
-        elif (tracer2.type == 'M'):
-            p_pt = ptc.get_pim(Pd1d1, ga4,
-                               c11, c21, cd1)
-        else:
-            raise NotImplementedError("Combination %s-%s not implemented yet" %
-                                      (tracer1.type, tracer2.type))
-    elif (tracer1.type == 'M'):
-        if (tracer2.type == 'NC'):
-            b12 = tracer2.b1(z_arr)
-            b22 = tracer2.b2(z_arr)
-            bs2 = tracer2.bs(z_arr)
-            p_pt = ptc.get_pgm(Pd1d1, ga4,
-                               b12, b22, bs2)
-        elif (tracer2.type == 'IA'):
-            c12 = tracer2.c1(z_arr)
-            c22 = tracer2.c2(z_arr)
-            cd2 = tracer2.cdelta(z_arr)
-            p_pt = ptc.get_pim(Pd1d1, ga4,
-                               c12, c22, cd2)
-        elif (tracer2.type == 'M'):
-            p_pt = Pd1d1
-        else:
-            raise NotImplementedError("Combination %s-%s not implemented yet" %
-                                      (tracer1.type, tracer2.type))
+    # The power spectra are computed in tiles of scale factor values,
+    # so that the (N_a, N_k) intermediate arrays stay small.
+    na = len(a_arr)
+    if return_ia_ee_and_bb:
+        p_pt = tuple(ptc._get_out_buf(na, n_out=2))
     else:
-        raise NotImplementedError("Combination %s-%s not implemented yet" %
-                                  (tracer1.type, tracer2.type))
+        p_pt = ptc._get_out_buf(na)[0]
+    for i0 in range(0, na, _A_TILE):
+        sl = slice(i0, i0 + _A_TILE)
+        if return_ia_ee_and_bb:
+            out = (p_pt[0][sl], p_pt[1][sl])
+        else:
+            out = p_pt[sl]
+        Pd1d1 = _get_pd1d1(cosmo, ptc.ks, a_arr[sl], nonlin_pk_type,
+                           pk_lin_z0, ga2[sl], ga4[sl], ptc=ptc)
+        pk_func(ptc,
+                [b[sl] for b in biases1],
+                [b[sl] for b in biases2],
+                Pd1d1, ga4[sl], out, **opts)
 
     # Once you have created the 2-dimensional P(k) array,
     # then generate a Pk2D object as described in pk2d.py.
     if return_ia_ee_and_bb:
         pt_pk_ee = Pk2D(a_arr=a_arr,
-                        lk_arr=np.log(ptc.ks),
-                        pk_arr=p_pt[0].T,
+                        lk_arr=ptc._lk_arr,
+                        pk_arr=p_pt[0],
                         is_logp=False)
         pt_pk_bb = Pk2D(a_arr=a_arr,
-                        lk_arr=np.log(ptc.ks),
-                        pk_arr=p_pt[1].T,
+                        lk_arr=ptc._lk_arr,
+                        pk_arr=p_pt[1],
                         is_logp=False)
         return pt_pk_ee, pt_pk_bb
     else:
         pt_pk = Pk2D(a_arr=a_arr,
-                     lk_arr=np.log(ptc.ks),
-                     pk_arr=p_pt.T,
+                     lk_arr=ptc._lk_arr,
+                     pk_arr=p_pt,
                      is_logp=False)
         return pt_pk
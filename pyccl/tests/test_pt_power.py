@@ -91,6 +91,26 @@ def test_pt_tracer_get_bias():
         pt_tr.get_bias('b_one', 0.1)
 
 
+def test_pt_get_pk2d_bias_calls():
+    # User-defined tracer not calling the parent constructor
+    class CountingTracer(ccl.nl_pt.PTTracer):
+        def __init__(self):
+            self.type = 'NC'
+            self.biases = {'b1': lambda z: np.ones_like(z),
+                           'b2': lambda z: np.zeros_like(z),
+                           'bs': lambda z: np.zeros_like(z)}
+            self.n_calls = 0
+
+        def get_bias(self, bias_name, z):
+            self.n_calls += 1
+            return self.biases[bias_name](z)
+
+    tr = CountingTracer()
+    ccl.nl_pt.get_pt_pk2d(COSMO, tr, ptc=PTC)
+    # Biases are evaluated once per call for auto-correlations
+    assert tr.n_calls == 3
+
+
 def test_pt_workspace_smoke():
     w = ccl.nl_pt.PTCalculator(log10k_min=-3,
                                log10k_max=1,
@@ -135,6 +155,33 @@ def test_pt_pk2d_bb():
     assert pbb.eval(0.1, 0.9, COSMO) == pbb2.eval(0.1, 0.9, COSMO)
 
 
+@pytest.mark.parametrize('tr', ['TG', 'TI', 'TM'])
+def test_pt_get_pk2d_tiles(tr, monkeypatch):
+    # Results should not depend on how the scale factor
+    # values are split into tiles.
+    a_arr = np.linspace(0.3, 1., 50)
+    pk1 = ccl.nl_pt.get_pt_pk2d(COSMO, TRS[tr], ptc=PTC,
+                                a_arr=a_arr)
+    monkeypatch.setattr(ccl.nl_pt.power, '_A_TILE', 7)
+    pk2 = ccl.nl_pt.get_pt_pk2d(COSMO, TRS[tr], ptc=PTC,
+                                a_arr=a_arr)
+    for a in [0.4, 0.75, 1.]:
+        assert np.allclose(pk1.eval(PTC.ks, a, COSMO),
+                           pk2.eval(PTC.ks, a, COSMO),
+                           atol=0, rtol=1E-10)
+
+
+def test_pt_get_pk2d_out_buf():
+    # Output buffer is reused, but earlier results are unaffected
+    a_arr = np.linspace(0.5, 1., 8)
+    pk_gg = ccl.nl_pt.get_pt_pk2d(COSMO, TRS['TG'], ptc=PTC, a_arr=a_arr)
+    pk_ref = pk_gg.eval(PTC.ks, 0.7, COSMO)
+    buf = PTC._p_out_buf
+    ccl.nl_pt.get_pt_pk2d(COSMO, TRS['TI'], ptc=PTC, a_arr=a_arr)
+    assert PTC._p_out_buf is buf
+    assert np.all(pk_gg.eval(PTC.ks, 0.7, COSMO) == pk_ref)
+
+
 @pytest.mark.parametrize('nl', ['nonlinear', 'linear', 'spt'])
 def test_pt_get_pk2d_nl(nl):
     pk = ccl.nl_pt.get_pt_pk2d(COSMO, TRS['TG'],
@@ -142,6 +189,167 @@ def test_pt_get_pk2d_nl(nl):
     assert isinstance(pk, ccl.Pk2D)
 
 
+@pytest.mark.parametrize('nl', ['nonlinear', 'linear'])
+def test_pt_get_pk2d_mm_no_fastpt(nl):
+    ptc = ccl.nl_pt.PTCalculator(with_dd=True)
+    pk = ccl.nl_pt.get_pt_pk2d(COSMO, TRS['TM'], ptc=ptc,
+                               nonlin_pk_type=nl)
+    # FAST-PT is never run for the matter auto-spectrum
+    assert ptc.one_loop_dd is None
+    a = 0.7
+    if nl == 'nonlinear':
+        pk_ref = ccl.nonlin_matter_power(COSMO, ptc.ks, a)
+    else:
+        pk_ref = ccl.linear_matter_power(COSMO, ptc.ks, a)
+    assert np.allclose(pk.eval(ptc.ks, a, COSMO), pk_ref, rtol=1E-3)
+
+
+@pytest.mark.parametrize('nl', ['nonlinear', 'linear'])
+def test_pt_get_pk2d_mm_no_ptc(nl, monkeypatch):
+    ptc = ccl.nl_pt.PTCalculator(with_dd=False)
+    pk_ref = ccl.nl_pt.get_pt_pk2d(COSMO, TRS['TM'], ptc=ptc,
+                                   nonlin_pk_type=nl)
+
+    # No FAST-PT calculator is built if none is passed
+    def no_fastpt(*args, **kwargs):
+        raise AssertionError("FAST-PT should not be initialized")
+    monkeypatch.setattr(ccl.nl_pt.power.fpt, 'FASTPT', no_fastpt)
+    pk = ccl.nl_pt.get_pt_pk2d(COSMO, TRS['TM'], nonlin_pk_type=nl)
+    a = 0.7
+    assert np.all(pk.eval(ptc.ks, a, COSMO) ==
+                  pk_ref.eval(ptc.ks, a, COSMO))
+
+
+@pytest.mark.parametrize('tr', ['TG', 'TM'])
+def test_pt_get_pk2d_scale_dependent_growth(tr):
+    # Input linear power spectrum with scale-dependent growth
+    a_arr = np.linspace(0.1, 1., 50)
+    k_arr = np.logspace(-4.5, 2.5, 1000)
+    pk_arr = np.array([ccl.linear_matter_power(COSMO, k_arr, a) *
+                       (1 + 0.1 * (1 - a) * k_arr / (k_arr + 0.1))
+                       for a in a_arr])
+    cosmo = ccl.Cosmology(
+        Omega_c=0.27, Omega_b=0.045, h=0.67, sigma8=0.8, n_s=0.96,
+        transfer_function='bbks', matter_power_spectrum='linear')
+    cosmo._set_background_from_arrays(
+        a_array=a_arr,
+        chi_array=ccl.comoving_radial_distance(COSMO, a_arr),
+        hoh0_array=ccl.h_over_h0(COSMO, a_arr),
+        growth_array=ccl.growth_factor(COSMO, a_arr),
+        fgrowth_array=ccl.growth_rate(COSMO, a_arr))
+    cosmo._set_linear_power_from_arrays(a_arr, k_arr, pk_arr)
+
+    ptc = ccl.nl_pt.PTCalculator(with_NC=True)
+    # Unit linear bias: Pd1d1 is the linear matter power spectrum
+    trs = {'TG': ccl.nl_pt.PTNumberCountsTracer(1.),
+           'TM': TRS['TM']}
+    pk = ccl.nl_pt.get_pt_pk2d(cosmo, trs[tr], ptc=ptc,
+                               nonlin_pk_type='linear', a_arr=a_arr)
+    a = a_arr[20]
+    assert np.allclose(pk.eval(ptc.ks, a, cosmo),
+                       ccl.linear_matter_power(cosmo, ptc.ks, a),
+                       atol=0, rtol=1E-4)
+
+
+@pytest.mark.parametrize('nonlin', [True, False])
+def test_pt_pk_grid(nonlin):
+    a_arr = np.array([0.5, 0.8, 1.])
+    pk = ccl.nl_pt.power._get_pk_grid(COSMO, PTC.ks, a_arr,
+                                      nonlin=nonlin)
+    if nonlin:
+        pk_fn = ccl.nonlin_matter_power
+    else:
+        pk_fn = ccl.linear_matter_power
+    pk_t = np.array([pk_fn(COSMO, PTC.ks, a) for a in a_arr])
+    assert pk.shape == (len(a_arr), len(PTC.ks))
+    assert np.allclose(pk, pk_t, atol=0, rtol=1E-10)
+
+
+def test_ptc_update_pk_cached():
+    ptc = ccl.nl_pt.PTCalculator(with_NC=True,
+                                 with_IA=True,
+                                 with_dd=True)
+    pk = ccl.linear_matter_power(COSMO, ptc.ks, 1.)
+    ptc.update_pk(pk)
+    dd_bias = ptc.dd_bias
+    ia_ta = ptc.ia_ta
+    # Same power spectrum: nothing is recomputed
+    ptc.update_pk(pk.copy())
+    assert ptc.dd_bias is dd_bias
+    assert ptc.ia_ta is ia_ta
+    # Different power spectrum: kernels are updated
+    ptc.update_pk(2 * pk)
+    assert ptc.dd_bias is not dd_bias
+    assert np.allclose(ptc.ia_ta[0], 4 * ia_ta[0], atol=0, rtol=1E-3)
+
+
+def test_ptc_get_pxx_scalar_biases():
+    # Higher-order biases may be passed as scalars
+    pk = ccl.linear_matter_power(COSMO, PTC.ks, 1.)
+    PTC.update_pk(pk)
+    g4 = np.linspace(0.5, 1., 4)
+    one = np.ones_like(g4)
+    Pd1d1 = g4[:, None] * pk[None, :]
+    b1 = 2 * one
+    pgi = PTC.get_pgi(Pd1d1, g4, b1, 0.5, 0.3, b1, 0.2, 0.1)
+    pgi_a = PTC.get_pgi(Pd1d1, g4, b1, 0.5 * one, 0.3 * one,
+                        b1, 0.2 * one, 0.1 * one)
+    assert np.allclose(pgi, pgi_a, atol=0, rtol=1E-12)
+    pgm = PTC.get_pgm(Pd1d1, g4, b1, 0.5, 0.3)
+    pgm_a = PTC.get_pgm(Pd1d1, g4, b1, 0.5 * one, 0.3 * one)
+    assert np.allclose(pgm, pgm_a, atol=0, rtol=1E-12)
+    pim = PTC.get_pim(Pd1d1, g4, b1, 0.2, 0.1)
+    pim_a = PTC.get_pim(Pd1d1, g4, b1, 0.2 * one, 0.1 * one)
+    assert np.allclose(pim, pim_a, atol=0, rtol=1E-12)
+
+
+def test_ptc_update_pk_lazy():
+    ptc = ccl.nl_pt.PTCalculator(with_NC=True,
+                                 with_IA=True,
+                                 with_dd=True)
+    pk = ccl.linear_matter_power(COSMO, ptc.ks, 1.)
+    # Only the number counts kernels are computed
+    ptc.update_pk(pk, need_nc=True, need_ia=False, need_dd=False)
+    assert ptc.dd_bias is not None
+    assert ptc.ia_ta is None
+    # IA kernels are added later without recomputing the rest
+    dd_bias = ptc.dd_bias
+    ptc.update_pk(pk, need_nc=True, need_ia=True, need_dd=False)
+    assert ptc.dd_bias is dd_bias
+    assert ptc.ia_ta is not None
+    # New power spectrum: kernels that are not recomputed
+    # are cleared instead of kept from the previous one
+    ptc.update_pk(2 * pk, need_nc=False, need_ia=True, need_dd=False)
+    assert ptc.dd_bias is None
+    assert ptc.one_loop_dd is None
+    assert ptc.ia_ta is not None
+
+
+def test_pt_growth_cached():
+    from pyccl.nl_pt.power import _get_growth_powers
+    a_arr = np.linspace(0.5, 1., 8)
+    ga, ga2, ga4 = _get_growth_powers(COSMO, a_arr)
+    assert np.allclose(ga, ccl.growth_factor(COSMO, a_arr), rtol=0)
+    assert np.allclose(ga4, ga**4, rtol=1E-12)
+    # Same scale factors: cached values are returned
+    assert _get_growth_powers(COSMO, a_arr.copy())[0] is ga
+    # Only the last set of scale factors is kept
+    _get_growth_powers(COSMO, a_arr[:4])
+    assert _get_growth_powers(COSMO, a_arr)[0] is not ga
+
+
+def test_ptc_nc_spt():
+    # Number counts calculators can always provide the 1-loop
+    # matter power spectrum, whichever spectra were computed before
+    ptc = ccl.nl_pt.PTCalculator(with_NC=True,
+                                 with_IA=True,
+                                 with_dd=False)
+    ccl.nl_pt.get_pt_pk2d(COSMO, TRS['TI'], ptc=ptc)
+    ccl.nl_pt.get_pt_pk2d(COSMO, TRS['TI'], ptc=ptc,
+                          nonlin_pk_type='spt')
+    assert ptc.one_loop_dd is not None
+
+
 def test_ptc_raises():
     with pytest.raises(ValueError):
         PTC.update_pk(np.zeros(4))
@@ -187,6 +187,17 @@ def test_swig_power():
             3,
             status)
 
+    for func in [ccllib.linear_matter_power_2d_vec,
+                 ccllib.nonlin_matter_power_2d_vec]:
+        assert_raises(
+            CCLError,
+            func,
+            COSMO,
+            [0.5, 1.0],
+            [1.0, 2.0],
+            3,
+            status)
+
     for func in [ccllib.sigmaR_vec,
                  ccllib.sigmaV_vec]:
         assert_raises(